@@ -1,124 +1,192 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import orjson
 import requests
+import io
 import re
-from time import sleep
-from difflib import SequenceMatcher
+import string
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import monotonic, sleep
+from rapidfuzz import fuzz, process
+
+# Shared session so batch lookups reuse one TCP+TLS connection to CrossRef.
+# The mailto User-Agent routes requests to CrossRef's polite pool, which gets
+# priority over anonymous traffic
+SESSION = requests.Session()
+SESSION.headers.update({
+    "User-Agent": "PublicationDOIFinder/1.0 (mailto:iampranavj@gmail.com)"
+})
+
+# Bounded concurrency for batch lookups; lookups are almost entirely I/O
+# wait, and the token bucket below keeps the aggregate request rate inside
+# CrossRef's polite-pool limits
+MAX_WORKERS = 10
+
+# Compiled once at import; these run per entry in the parsing loop
+_RE_SPLIT = re.compile(r'(?=\d{4}\s*-\s*)')
+_RE_ENTRY = re.compile(
+    r'^(?P<year>\d{4})\s*-\s*(?P<authors>.*?)"(?P<title>[^"]+)"(?P<venue>.*)$',
+    re.DOTALL,
+)
+
+# Maps punctuation (except hyphens) to spaces in a single C-level pass
+_PUNCT_TABLE = str.maketrans({c: ' ' for c in string.punctuation if c != '-'})
+
+# Token bucket keeping all worker threads under CrossRef's ~50 req/s
+# polite-pool limit
+_RATE_LIMIT = 45
+_rate_lock = threading.Lock()
+_request_times = deque()
+
+def _throttle():
+    """Block until a request slot is free under the CrossRef rate limit"""
+    while True:
+        with _rate_lock:
+            now = monotonic()
+            while _request_times and now - _request_times[0] >= 1.0:
+                _request_times.popleft()
+            if len(_request_times) < _RATE_LIMIT:
+                _request_times.append(now)
+                return
+            wait = 1.0 - (now - _request_times[0])
+        sleep(wait)
 
 def clean_text_for_comparison(text):
     """Clean text for comparison by removing punctuation and standardizing spaces"""
-    text = re.sub(r'[^\w\s-]', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.lower().strip()
+    return ' '.join(text.translate(_PUNCT_TABLE).split()).lower()
 
+def _year_matches(result, year):
+    """Check a CrossRef result against the expected publication year"""
+    if year and "published-print" in result:
+        pub_year = str(result["published-print"].get("date-parts", [[""]])[0][0])
+        return pub_year == year
+    return True
+
+@st.cache_data(ttl=86400, show_spinner=False)
 def search_crossref_doi(title, authors='', year=''):
-    """Search CrossRef API for a DOI using article title, authors, and year"""
+    """Search CrossRef API for a DOI using article title, authors, and year
+
+    Raises on network or HTTP failure so the failed lookup is never cached;
+    callers catch the exception and render it on the main thread.
+    """
     base_url = "https://api.crossref.org/works"
     clean_title = title.strip().replace('\n', ' ')
-    
+
+    bib = " ".join(filter(None, [clean_title, authors, year]))
     params = {
-        "query.title": f'"{clean_title}"',
+        "query.bibliographic": bib,
         "rows": 3,
-        "select": "DOI,title,published-print,author,container-title",
+        "select": "DOI,title,published-print",
     }
-    
-    try:
-        response = requests.get(base_url, params=params)
-        if response.status_code == 200:
-            results = response.json()
-            if not results["message"]["items"]:
-                return ""
-            
-            input_title_clean = clean_text_for_comparison(clean_title)
-            
-            for result in results["message"]["items"]:
-                if "title" not in result or not result["title"]:
-                    continue
-                
-                result_title = result["title"][0]
-                result_title_clean = clean_text_for_comparison(result_title)
-                similarity = SequenceMatcher(None, result_title_clean, input_title_clean).ratio()
-                
-                if similarity > 0.85:
-                    if year and "published-print" in result:
-                        pub_year = str(result["published-print"].get("date-parts", [[""]])[0][0])
-                        if pub_year != year:
-                            continue
-                    return result.get("DOI", "")
-        return ""
-    except Exception as e:
-        st.warning(f"Error searching DOI: {str(e)}")
+
+    _throttle()
+    response = SESSION.get(base_url, params=params)
+    response.raise_for_status()
+    results = orjson.loads(response.content)
+    if not results["message"]["items"]:
         return ""
 
+    input_title_clean = clean_text_for_comparison(clean_title)
+
+    candidates = [r for r in results["message"]["items"] if r.get("title")]
+    choices = [clean_text_for_comparison(r["title"][0]) for r in candidates]
+
+    # Most top hits are exact after normalization; skip fuzzy scoring.
+    # A year mismatch moves on to the next candidate: CrossRef often
+    # holds several records for one title (preprint, reprint, erratum)
+    for pos, choice in enumerate(choices):
+        if choice == input_title_clean:
+            result = candidates[pos]
+            if not _year_matches(result, year):
+                continue
+            return result.get("DOI", "")
+
+    matches = process.extract(
+        input_title_clean, choices, scorer=fuzz.ratio, score_cutoff=85
+    )
+
+    for _, _, pos in matches:
+        result = candidates[pos]
+        if _year_matches(result, year):
+            return result.get("DOI", "")
+    return ""
+
+@st.cache_data(show_spinner=False)
 def extract_publications(text):
-    """Extract publications from text with complex format handling"""
-    entries = re.split(r'(?=\d{4}\s*-\s*)', text)
+    """Extract publications from text with complex format handling
+
+    Returns a (publications, warnings) tuple; warnings are plain strings so
+    the cached body stays free of Streamlit calls.
+    """
+    entries = _RE_SPLIT.split(text)
     publications = []
-    
+    warnings = []
+
     for entry in entries:
         entry = entry.strip()
         if not entry:
             continue
-            
-        try:
-            year_match = re.match(r'(\d{4})\s*-\s*', entry)
-            if not year_match:
-                continue
-                
-            year = year_match.group(1)
-            title_match = re.search(r'"([^"]+)"', entry)
-            if not title_match:
-                continue
-                
-            title = title_match.group(1).strip()
-            start_pos = year_match.end()
-            end_pos = title_match.start()
-            authors = entry[start_pos:end_pos].strip().rstrip('.')
-            venue = entry[title_match.end():].strip().strip('.')
-            
-            publications.append({
-                'Year': year,
-                'Authors': authors,
-                'Title': title,
-                'Venue': venue
-            })
-            
-        except Exception as e:
-            st.warning(f"Failed to parse entry: {entry[:100]}... Error: {str(e)}")
+
+        match = _RE_ENTRY.match(entry)
+        if not match:
+            # The split guarantees every entry after any preamble starts with
+            # a year marker, so a non-match means a malformed record
+            if entry[:4].isdigit():
+                warnings.append(f"Failed to parse entry: {entry[:100]}...")
             continue
-    
-    return publications
 
-def create_doi_url(doi):
-    """Create DOI URL if DOI exists"""
-    if doi and doi.startswith('10.'):
-        return f"https://doi.org/{doi}"
-    return ""
+        publications.append({
+            'Year': match['year'],
+            'Authors': match['authors'].strip().rstrip('.'),
+            'Title': match['title'].strip(),
+            'Venue': match['venue'].strip().strip('.')
+        })
+
+    return publications, warnings
 
 def process_dois(df, progress_bar=None):
     """Process a batch of articles to find DOIs"""
-    dois = []
-    total = len(df)
+    # Duplicate titles (common in author self-listings) get one lookup each;
+    # results fan back out to every row sharing the title
+    unique = df.drop_duplicates(subset='Title')
+    total = len(unique)
     found_count = 0
-    
-    for idx, row in df.iterrows():
-        if progress_bar:
-            progress_bar.progress((idx + 1) / total)
-            
-        doi = search_crossref_doi(
-            title=row['Title'],
-            authors=row.get('Authors', ''),
-            year=row.get('Year', '')
-        )
-        
-        if doi and doi.startswith('10.'):
-            found_count += 1
-            st.sidebar.write(f"Found DOIs: {found_count}")
-            
-        dois.append(doi)
-        sleep(1)  # Rate limiting
-    
-    return dois
+    results = {}
+    # Single placeholder updated in place; every st call round-trips over the
+    # websocket, so renders are throttled to every 10th completion
+    found_metric = st.sidebar.empty()
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {}
+        for row in unique.itertuples(index=False):
+            future = executor.submit(
+                search_crossref_doi,
+                title=row.Title,
+                authors=row.Authors,
+                year=row.Year
+            )
+            futures[future] = row.Title
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                doi = future.result()
+            except Exception as e:
+                doi = ""
+                st.warning(f"Error searching DOI: {str(e)}")
+            results[futures[future]] = doi
+
+            if doi and doi.startswith('10.'):
+                found_count += 1
+
+            if done % 10 == 0 or done == total:
+                if progress_bar:
+                    progress_bar.progress(done / total)
+                found_metric.metric("Found DOIs", found_count)
+
+    return df['Title'].map(results).tolist()
 
 # Set page config
 st.set_page_config(
@@ -174,7 +242,7 @@ with st.sidebar:
         df = st.session_state.processed_df
         st.write(f"Total Publications: {len(df)}")
         if 'DOI' in df.columns:
-            doi_found = df['DOI'].apply(lambda x: bool(x) and x.startswith('10.')).sum()
+            doi_found = df['DOI'].str.startswith('10.', na=False).sum()
             st.write(f"DOIs Found: {doi_found}")
             st.write(f"Not Found: {len(df) - doi_found}")
 
@@ -188,7 +256,11 @@ if st.session_state.active_tab == "Single Search":
     
     if st.button("Search DOI") and title:
         with st.spinner("Searching..."):
-            doi = search_crossref_doi(title, authors, year)
+            try:
+                doi = search_crossref_doi(title, authors, year)
+            except Exception as e:
+                doi = ""
+                st.warning(f"Error searching DOI: {str(e)}")
             if doi:
                 st.success(f"DOI: {doi}")
                 st.success(f"DOI URL: https://doi.org/{doi}")
@@ -215,7 +287,9 @@ elif st.session_state.active_tab == "Batch Processing":
     # Process publications button
     if text_input and st.button("1. Process Publications"):
         with st.spinner("Extracting publications..."):
-            publications = extract_publications(text_input)
+            publications, parse_warnings = extract_publications(text_input)
+            for warning in parse_warnings:
+                st.warning(warning)
             if not publications:
                 st.error("No publications found in the input")
                 st.stop()
@@ -234,7 +308,8 @@ elif st.session_state.active_tab == "Batch Processing":
             with st.spinner("Finding DOIs..."):
                 dois = process_dois(df, progress_bar)
                 df['DOI'] = dois
-                df['DOI URL'] = df['DOI'].apply(create_doi_url)
+                has_doi = df['DOI'].str.startswith('10.', na=False)
+                df['DOI URL'] = np.where(has_doi, "https://doi.org/" + df['DOI'], "")
                 st.session_state.processed_df = df
                 
                 # Show results
@@ -243,17 +318,19 @@ elif st.session_state.active_tab == "Batch Processing":
                 st.dataframe(df[columns])
                 
                 # Download buttons
-                csv = df.to_csv(index=False)
+                csv_buffer = io.BytesIO()
+                df.to_csv(csv_buffer, index=False, encoding='utf-8')
+                csv_buffer.seek(0)
                 st.download_button(
                     "📥 Download Results (CSV)",
-                    csv,
+                    csv_buffer,
                     "publications_with_dois.csv",
                     "text/csv"
                 )
                 
                 # Statistics
                 st.write("\nStatistics:")
-                doi_found = df['DOI'].apply(lambda x: bool(x) and x.startswith('10.')).sum()
+                doi_found = has_doi.sum()
                 st.write(f"DOIs found: {doi_found} out of {len(df)} publications ({(doi_found/len(df)*100):.1f}%)")
 
 else:  # About tab